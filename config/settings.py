@@ -1,17 +1,17 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Tuple
-from enum import Enum
+from enum import IntEnum
 
 
-class GeneratorState(Enum):
-    """Стани генератора"""
+class GeneratorState(IntEnum):
+    """Стани генератора (значення - індекси в таблицях відображення)"""
 
-    UNKNOWN = "unknown"
-    ON = "on"
-    OFF = "off"
+    UNKNOWN = 0
+    ON = 1
+    OFF = 2
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class CameraConfig:
     """Конфігурація камери"""
 
@@ -20,14 +20,24 @@ class CameraConfig:
     ip: str
     port: int = 554
     stream_path: str = "play1.sdp"
+    # URL містить пароль, тому не потрапляє в repr
+    _url: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Клас заморожений, тож значення встановлюється в обхід __setattr__
+        object.__setattr__(
+            self,
+            "_url",
+            f"rtsp://{self.username}:{self.password}@{self.ip}:{self.port}/{self.stream_path}",
+        )
 
     @property
     def url(self) -> str:
         """Повний URL камери"""
-        return f"rtsp://{self.username}:{self.password}@{self.ip}:{self.port}/{self.stream_path}"
+        return self._url
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DetectionConfig:
     """Конфігурація визначення"""
 
@@ -46,7 +56,7 @@ class DetectionConfig:
             raise ValueError("Min bright pixels must be non-negative")
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TelegramConfig:
     """Конфігурація Telegram"""
 
@@ -61,7 +71,7 @@ class TelegramConfig:
             raise ValueError("Telegram chat ID not configured")
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class MonitorConfig:
     """Загальна конфігурація моніторингу"""
 
@@ -1,17 +1,74 @@
 import os
 import time
 import logging
+import threading
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Tuple
+import cv2
 import numpy as np
 
 from database.repository import DatabaseRepository
 from database.statistics import StatisticsService
 from interfaces.base import ICamera, IDetector, INotifier
 from config.settings import MonitorConfig, GeneratorState
+from detection import kernel
 import notification.const_text as ct
+from visualization import kernel as draw_kernel
 from visualization.visualizer import FrameVisualizer
 
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR
+except ImportError:
+    TurboJPEG = None
+
+# Якість JPEG для знімків
+SNAPSHOT_JPEG_QUALITY = 85
+# Буфер запису знімка (файл пишеться одним системним викликом)
+SNAPSHOT_WRITE_BUFFER = 1 << 20
+
+# Детекція пропускається, поки середнє кожного каналу ROI відрізняється
+# від останньої перевіреної менше ніж на допуск, але не довше за heartbeat.
+# Окремі канали, бо червона лампа майже не змінює середній grayscale
+SIGNATURE_TOLERANCE = 2.0
+DETECTION_HEARTBEAT = 60
+
+# Формат часу для повідомлень та для імен файлів знімків
+HUMAN_TIME_FORMAT = "%d.%m.%Y %H:%M:%S"
+FILE_TIME_FORMAT = "%Y-%m-%d_%H-%M-%S"
+
+# Таблиці відображення, індексуються значенням GeneratorState
+_STATE_TO_EMOJI = ("", "🟢", "🔴")
+_STATE_TO_STATUS = ("", "УВІМКНЕНО", "ВИМКНЕНО")
+_STATE_TO_LAMP_STATUS = ("", "світиться", "не світиться")
+_STATE_TO_SNAPSHOT_PREFIX = ("", "generator_on", "generator_off")
+
+# Результат детекції (False/True) -> стан генератора
+_DETECTION_TO_STATE = (GeneratorState.OFF, GeneratorState.ON)
+
+
+@lru_cache(maxsize=4)
+def _fmt_ts(epoch_sec: int, fmt: str) -> str:
+    """
+    Форматування часу з точністю до секунди
+
+    Кешується, тож кілька форматувань у межах однієї секунди
+    (типово при зміні стану) виконують strftime лише раз на формат.
+    """
+    return datetime.fromtimestamp(epoch_sec).strftime(fmt)
+
+
+def _now_strings() -> Tuple[str, str]:
+    """
+    Поточний час, отриманий один раз, у всіх потрібних форматах
+
+    Returns:
+        (час для повідомлень, час для імені файлу)
+    """
+    sec = int(time.time())
+    return _fmt_ts(sec, HUMAN_TIME_FORMAT), _fmt_ts(sec, FILE_TIME_FORMAT)
+
 
 class GeneratorMonitor:
     """
@@ -45,13 +102,37 @@ class GeneratorMonitor:
         self._stats = StatisticsService(db_repository)
 
         self._current_state: GeneratorState = GeneratorState.UNKNOWN
+        self._last_signature: Optional[Tuple[float, ...]] = None
+        self._last_detection_time = 0.0
         self._active_session_id: Optional[int] = None
         self._is_running = False
+        self._stop_event = threading.Event()
         self._start_time: Optional[datetime] = None
+        # Для тривалості роботи - не залежить від переведення годинника
+        self._start_monotonic: Optional[float] = None
         self._state_change_count = 0
 
+        # Відправка сповіщень у фоні, щоб не блокувати наступний кадр
+        self._notify_pool = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="notifier"
+        )
+        # Запис знімків на диск поза основним циклом
+        self._io_pool = ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix="snapshot"
+        )
+
         self._logger = logging.getLogger(self.__class__.__name__)
         self._setup_folders()
+        self._jpeg = self._create_jpeg_encoder()
+
+        # Зріз ROI для попередньої обробки кадру
+        x, y, w, h = detector.roi
+        self._roi_slice = np.s_[y : y + h, x : x + w]
+        self._visualizer.update_roi(detector.roi)
+
+        # Компіляція ядер детекції та візуалізації до старту циклу
+        kernel.warmup()
+        draw_kernel.warmup()
 
     def _setup_folders(self):
         """Створення необхідних папок"""
@@ -61,27 +142,44 @@ class GeneratorMonitor:
     def start(self):
         """Запуск моніторингу"""
         self._is_running = True
+        self._stop_event.clear()
         self._start_time = datetime.now()
+        self._start_monotonic = time.monotonic()
 
         self._logger.info("=" * 40)
         self._logger.info("🚀 Запуск системи моніторингу з БД")
         self._logger.info("=" * 40)
 
-        # Перевіряємо чи є незавершена сесія
-        active_session = self._db.get_active_session()
-        if active_session:
-            self._logger.warning(
-                f"Знайдено незавершену сесію #{active_session}"
-            )
-            self._active_session_id = active_session
+        try:
+            # Перевіряємо чи є незавершена сесія
+            active_session = self._db.get_active_session()
+            if active_session:
+                self._logger.warning(
+                    f"Знайдено незавершену сесію #{active_session}"
+                )
+                self._active_session_id = active_session
 
-        self._send_startup_notification()
-        self._main_loop()
+            # Відправка в потоці сповіщень: TLS-з'єднання з Telegram і
+            # підключення до камери виконуються одночасно. Один робочий
+            # потік зберігає порядок повідомлень
+            self._notify_pool.submit(self._send_startup_notification)
+            self._main_loop()
+        finally:
+            # Завершення в потоці циклу, коли кадр уже не обробляється
+            self._shutdown()
 
     def stop(self):
-        """Зупинка"""
+        """
+        Сигнал зупинки (можна викликати з будь-якого потоку)
+
+        Лише перериває очікування основного циклу; сесію, камеру та
+        фонові потоки завершує start() після виходу з циклу.
+        """
         self._is_running = False
+        self._stop_event.set()
 
+    def _shutdown(self):
+        """Завершення роботи після виходу з основного циклу"""
         # Завершуємо активну сесію якщо є
         if self._active_session_id:
             self._logger.warning(
@@ -90,11 +188,26 @@ class GeneratorMonitor:
             self._db.end_session(
                 self._active_session_id, 0, "Система зупинена"
             )
+            self._active_session_id = None
+            self._stats.invalidate_stats_cache()
 
         self._camera.disconnect()
+
+        # Дочекатися запису знімків та відправки сповіщень у черзі
+        self._io_pool.shutdown(wait=True)
+        self._notify_pool.shutdown(wait=True)
         self._send_shutdown_notification()
         self._logger.info("🛑 Моніторинг зупинено")
 
+    def _wait(self, seconds: float) -> bool:
+        """
+        Очікування, яке переривається при зупинці
+
+        Returns:
+            True, якщо під час очікування надійшов сигнал зупинки
+        """
+        return self._stop_event.wait(max(seconds, 0))
+
     def _main_loop(self):
         """Основний цикл"""
         while self._is_running:
@@ -104,19 +217,23 @@ class GeneratorMonitor:
                         self._logger.warning(
                             f"Повторна спроба через {self._config.reconnect_delay} сек..."
                         )
-                        time.sleep(self._config.reconnect_delay)
+                        self._wait(self._config.reconnect_delay)
                         continue
 
+                # Наступна перевірка планується від початку поточної,
+                # тож час обробки кадру не зсуває інтервал
+                next_check = time.monotonic() + self._config.check_interval
+
                 ret, frame = self._camera.get_frame()
 
                 if not ret or frame is None:
                     self._logger.warning("Не вдалося отримати кадр")
                     self._camera.disconnect()
-                    time.sleep(self._config.reconnect_delay)
+                    self._wait(self._config.reconnect_delay)
                     continue
 
                 self._process_frame(frame)
-                time.sleep(self._config.check_interval)
+                self._wait(next_check - time.monotonic())
 
             except KeyboardInterrupt:
                 self._logger.info("⚠️ Отримано сигнал зупинки")
@@ -124,81 +241,139 @@ class GeneratorMonitor:
                 break
             except Exception as e:
                 self._logger.error(f"Помилка: {e}")
-                time.sleep(10)
+                self._wait(10)
 
     def _process_frame(self, frame: np.ndarray):
         """Обробка кадру"""
-        is_detected, bright_pixels = self._detector.detect(frame)
-        new_state = GeneratorState.ON if is_detected else GeneratorState.OFF
+        roi_frame = frame[self._roi_slice]
+        if self._is_frame_unchanged(roi_frame):
+            return
 
-        # Перевірка зміни стану
-        if self._current_state == GeneratorState.UNKNOWN:
-            self._current_state = new_state
-            self._handle_state_change(frame, bright_pixels)
-        elif self._current_state != new_state:
+        # Grayscale лише для ROI, один раз на кадр
+        gray_roi = self._to_gray_roi(roi_frame)
+
+        is_detected, bright_pixels = self._detector.detect(frame, gray_roi)
+        new_state = _DETECTION_TO_STATE[bool(is_detected)]
+
+        # Перевірка зміни стану (перше визначення не рахується як зміна)
+        if self._current_state != new_state:
+            self._state_change_count += (
+                self._current_state != GeneratorState.UNKNOWN
+            )
             self._current_state = new_state
-            self._state_change_count += 1
             self._handle_state_change(frame, bright_pixels)
 
+    def _is_frame_unchanged(self, roi_frame: np.ndarray) -> bool:
+        """
+        Швидка перевірка, чи змінився ROI з моменту останньої детекції
+
+        Сигнатура - середні значення каналів BGR: зміна grayscale не
+        більша за найбільшу зміну каналу, а червоний канал, за яким
+        детектор окремо ловить червону лампу, перевіряється напряму.
+        Порівняння йде з кадром останньої детекції, а не з попереднім,
+        тож повільний дрейф яскравості накопичується і не губиться.
+        """
+        signature = cv2.mean(roi_frame)
+        now = time.monotonic()
+
+        if (
+            self._current_state != GeneratorState.UNKNOWN
+            and self._last_signature is not None
+            and max(
+                abs(value - last)
+                for value, last in zip(signature, self._last_signature)
+            )
+            < SIGNATURE_TOLERANCE
+            and now - self._last_detection_time < DETECTION_HEARTBEAT
+        ):
+            return True
+
+        self._last_signature = signature
+        self._last_detection_time = now
+        return False
+
+    def _to_gray_roi(self, roi_frame: np.ndarray) -> np.ndarray:
+        """Перетворення ROI у grayscale"""
+        if roi_frame.ndim == 3:
+            return cv2.cvtColor(roi_frame, cv2.COLOR_BGR2GRAY)
+        return roi_frame
+
     def _handle_state_change(self, frame: np.ndarray, bright_pixels: int):
         """Обробка зміни стану з БД"""
-        is_on = self._current_state == GeneratorState.ON
-        timestamp = datetime.now()
+        state = self._current_state
+        is_on = state == GeneratorState.ON
+        time_str, file_time_str = _now_strings()
 
         # Логування
-        emoji = "🟢" if is_on else "🔴"
-        status = "УВІМКНЕНО" if is_on else "ВИМКНЕНО"
+        emoji = _STATE_TO_EMOJI[state]
+        status = _STATE_TO_STATUS[state]
         self._logger.info(f"{emoji} Генератор {status}")
 
-        # Збереження знімка
+        # Збереження знімка. retrieve() щоразу віддає новий масив, і після
+        # детекції кадр більше ніде не потрібен, тож малюємо прямо на
+        # ньому - він спільний для запису знімка та сповіщення (обидва
+        # лише читають його)
         visual_frame = self._visualizer.visualize(
-            frame, self._detector.roi, is_on, bright_pixels
+            frame, self._detector.roi, is_on, bright_pixels, inplace=True
         )
         snapshot_path = self._save_snapshot(
-            visual_frame, "generator_on" if is_on else "generator_off"
+            visual_frame,
+            _STATE_TO_SNAPSHOT_PREFIX[state],
+            file_time_str,
         )
 
-        # Робота з БД
-        if is_on:
-            # Генератор увімкнено - починаємо нову сесію
-            self._active_session_id = self._db.start_session(bright_pixels)
-            self._db.add_event("ON", bright_pixels, "Генератор увімкнено")
-        else:
-            # Генератор вимкнено - завершуємо сесію
-            if self._active_session_id:
-                self._db.end_session(self._active_session_id, bright_pixels)
-                self._active_session_id = None
-            self._db.add_event("OFF", bright_pixels, "Генератор вимкнено")
+        # Робота з БД (одна транзакція на зміну стану)
+        with self._db.transaction():
+            if is_on:
+                # Генератор увімкнено - починаємо нову сесію
+                self._active_session_id = self._db.start_session(bright_pixels)
+                self._db.add_event("ON", bright_pixels, "Генератор увімкнено")
+            else:
+                # Генератор вимкнено - завершуємо сесію
+                if self._active_session_id:
+                    self._db.end_session(
+                        self._active_session_id, bright_pixels
+                    )
+                self._db.add_event("OFF", bright_pixels, "Генератор вимкнено")
+        self._stats.invalidate_stats_cache()
 
         # Створення повідомлення зі статистикою
         message = self._create_state_message_with_stats(
-            is_on, timestamp, bright_pixels
+            state, time_str, bright_pixels
+        )
+        if not is_on:
+            # Сесія потрібна для статистики в повідомленні, тож
+            # скидаємо її лише після його створення
+            self._active_session_id = None
+
+        # Відправка сповіщень (у фоновому потоці, з збереженням порядку)
+        caption = f"{emoji} <b>{status}</b>\n{time_str}"
+        self._notify_pool.submit(
+            self._notifier.send_image_with_message,
+            visual_frame,
+            message,
+            caption,
         )
-
-        # Відправка сповіщень
-        self._notifier.send_message(message)
-        caption = f"{emoji} <b>{status}</b>\n{timestamp.strftime('%d.%m.%Y %H:%M:%S')}"
-        self._notifier.send_image(visual_frame, caption)
 
     def _create_state_message_with_stats(
-        self, is_on: bool, timestamp: datetime, bright_pixels: int
+        self, state: GeneratorState, time_str: str, bright_pixels: int
     ) -> str:
         """Створення повідомлення зі статистикою"""
-        emoji = "🟢" if is_on else "🔴"
-        status = "УВІМКНЕНО" if is_on else "ВИМКНЕНО"
-        lamp_status = "світиться" if is_on else "не світиться"
+        emoji = _STATE_TO_EMOJI[state]
+        status = _STATE_TO_STATUS[state]
+        lamp_status = _STATE_TO_LAMP_STATUS[state]
 
         # Створення повідомлення
         message = ct.msg_state_lamp.format(
             emoji=emoji,
             status=status,
-            timestamp=timestamp.strftime("%d.%m.%Y %H:%M:%S"),
+            timestamp=time_str,
             lamp_status=lamp_status,
             bright_pixels=bright_pixels,
         )
 
         # Якщо вимкнено - показуємо статистику останньої сесії
-        if not is_on and self._active_session_id:
+        if state == GeneratorState.OFF and self._active_session_id:
             session = self._db.get_session(self._active_session_id)
             if session and session.duration_hours:
                 fuel_config = self._db.get_fuel_config()
@@ -225,18 +400,76 @@ class GeneratorMonitor:
 
         return message
 
-    def _save_snapshot(self, frame: np.ndarray, prefix: str) -> str:
-        """Збереження знімка"""
-        import cv2
+    def _save_snapshot(
+        self, frame: np.ndarray, prefix: str, file_time_str: str
+    ) -> str:
+        """
+        Збереження знімка у фоновому потоці
+
+        Args:
+            frame: Кадр (не повинен змінюватись, поки триває запис)
+            prefix: Префікс імені файлу
+            file_time_str: Час події у форматі FILE_TIME_FORMAT
 
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        Returns:
+            Шлях до файлу (запис може ще тривати)
+        """
         filename = os.path.join(
-            self._config.snapshot_folder, f"{prefix}_{timestamp}.jpg"
+            self._config.snapshot_folder, f"{prefix}_{file_time_str}.jpg"
         )
-        cv2.imwrite(filename, frame)
-        self._logger.info(f"💾 Знімок: {filename}")
+        self._io_pool.submit(self._write_snapshot, filename, frame)
         return filename
 
+    def _create_jpeg_encoder(self) -> Optional["TurboJPEG"]:
+        """libjpeg-turbo кодер, якщо доступний (інакше - OpenCV)"""
+        if TurboJPEG is None:
+            return None
+        try:
+            return TurboJPEG()
+        except Exception as e:
+            self._logger.warning(f"TurboJPEG недоступний: {e}")
+            return None
+
+    def _encode_jpeg(self, frame: np.ndarray) -> Optional[bytes]:
+        """Кодування кадру в JPEG"""
+        if self._jpeg is not None:
+            return self._jpeg.encode(
+                frame,
+                quality=SNAPSHOT_JPEG_QUALITY,
+                pixel_format=TJPF_BGR,
+            )
+
+        params = [
+            cv2.IMWRITE_JPEG_QUALITY,
+            SNAPSHOT_JPEG_QUALITY,
+            cv2.IMWRITE_JPEG_OPTIMIZE,
+            0,
+        ]
+        ok, buf = cv2.imencode(".jpg", frame, params)
+        return buf.tobytes() if ok else None
+
+    def _write_snapshot(self, filename: str, frame: np.ndarray):
+        """Кодування та запис знімка на диск"""
+        try:
+            data = self._encode_jpeg(frame)
+            if data is None:
+                self._logger.error(f"Не вдалося закодувати знімок: {filename}")
+                return
+
+            # Запис у тимчасовий файл і атомарне перейменування, щоб
+            # не залишити обрізаний знімок; fsync свідомо не робимо.
+            # Ідентифікатор потоку в імені файлу - бо два знімки за одну секунду
+            # можуть записуватись паралельно
+            tmp_filename = f"{filename}.{threading.get_ident()}.tmp"
+            with open(
+                tmp_filename, "wb", buffering=SNAPSHOT_WRITE_BUFFER
+            ) as f:
+                f.write(data)
+            os.replace(tmp_filename, filename)
+            self._logger.info(f"💾 Знімок: {filename}")
+        except Exception as e:
+            self._logger.error(f"Помилка збереження знімка: {e}")
+
     def _send_startup_notification(self):
         """Сповіщення про запуск моніторингу.
         - час запуску
@@ -245,7 +478,9 @@ class GeneratorMonitor:
         """
         # Створення повідомлення
         message = ct.msg_startup_monitor.format(
-            start_time=self._start_time.strftime("%d.%m.%Y %H:%M:%S"),
+            start_time=_fmt_ts(
+                int(self._start_time.timestamp()), HUMAN_TIME_FORMAT
+            ),
             camera_ip=self._config.camera.ip,
             check_interval=self._config.check_interval,
         )
@@ -255,13 +490,14 @@ class GeneratorMonitor:
     def _send_shutdown_notification(self):
         """Сповіщення про зупинку"""
         if self._start_time:
+            time_str, _ = _now_strings()
+
             # Оцінка часу роботи
-            duration = datetime.now() - self._start_time
-            hours = duration.total_seconds() / 3600
+            hours = (time.monotonic() - self._start_monotonic) / 3600
 
             # Створення повідомлення
             message = ct.msg_shutdown_monitor.format(
-                date_time=datetime.now().strftime("%d.%m.%Y %H:%M:%S"),
+                date_time=time_str,
                 duration=round(hours, 2),
                 state_change_count=self._state_change_count,
             )
@@ -25,7 +25,12 @@ class GeneratorSession:
     notes: Optional[str] = None
 
     def calculate_duration(self):
-        """Розрахунок тривалості"""
+        """
+        Розрахунок тривалості
+
+        Для збережених сесій значення вже обчислює БД
+        (DatabaseRepository.end_session), метод - для разових розрахунків.
+        """
         if self.start_time and self.end_time:
             delta = self.end_time - self.start_time
             self.duration_seconds = int(delta.total_seconds())
@@ -58,7 +63,7 @@ class GeneratorEvent:
     message: Optional[str] = None
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class FuelConfig:
     """
     Конфігурація витрат палива
@@ -4,15 +4,157 @@
 
 import logging
 import sqlite3
+import threading
+from bisect import bisect_right
+import time
 from contextlib import contextmanager
-from datetime import datetime
-from typing import Generator, List, Optional
+from datetime import date, datetime, timedelta, timezone
+from typing import Generator, Iterator, List, Optional, Tuple
+from zoneinfo import ZoneInfo
 
-import pytz
 
 # Ваші моделі (замініть на ваші імпорти)
 from database.models import GeneratorSession, GeneratorEvent, FuelConfig
 
+KYIV_TZ = ZoneInfo("Europe/Kyiv")
+
+# Налаштування, що діють лише в межах одного з'єднання
+_CONNECTION_PRAGMAS = (
+    # У режимі WAL достатньо і не потребує fsync на кожен коміт
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA busy_timeout=30000",
+    "PRAGMA foreign_keys=ON",
+)
+
+# Як часто оновлювати статистику планувальника (PRAGMA optimize), сек
+OPTIMIZE_INTERVAL = 15 * 60
+
+# Розмір кешу підготовлених запитів з'єднання
+CACHED_STATEMENTS = 256
+
+# Версія схеми (PRAGMA user_version). 1 - час як unix epoch (INTEGER)
+SCHEMA_VERSION = 1
+
+# Колонки часу, що до версії 1 зберігались ISO-рядками
+_EPOCH_COLUMNS = (
+    ("generator_sessions", "start_time"),
+    ("generator_sessions", "end_time"),
+    ("generator_events", "timestamp"),
+    ("fuel_config", "updated_at"),
+)
+
+
+def _adapt_datetime(dt: datetime) -> int:
+    """datetime -> unix epoch; нативний час вважається часом Europe/Kyiv"""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=KYIV_TZ)
+    return int(dt.timestamp())
+
+
+def _convert_timestamp(value: bytes) -> datetime:
+    """TIMESTAMP з БД -> datetime у зоні Europe/Kyiv"""
+    try:
+        return datetime.fromtimestamp(int(value), KYIV_TZ)
+    except ValueError:
+        # created_at заповнює CURRENT_TIMESTAMP: рядок у UTC
+        dt = datetime.fromisoformat(value.decode())
+        return dt.replace(tzinfo=timezone.utc).astimezone(KYIV_TZ)
+
+
+# Перетворення часу виконує модуль sqlite3 під час запису та читання
+sqlite3.register_adapter(datetime, _adapt_datetime)
+sqlite3.register_converter("TIMESTAMP", _convert_timestamp)
+
+# ========== SQL ==========
+# Тексти запитів - незмінні константи, тож кеш підготовлених запитів
+# sqlite3 знаходить їх без повторного розбору SQL
+
+_SQL_INSERT_SESSION = (
+    "INSERT INTO generator_sessions (start_time, start_bright_pixels) "
+    "VALUES (?, ?)"
+)
+
+# Тривалість і витрати палива рахує SQLite під час оновлення
+# (час зберігається як unix epoch у секундах)
+_SQL_END_SESSION = """
+    UPDATE generator_sessions
+    SET end_time = :end_time,
+        duration_seconds = :end_time - start_time,
+        duration_hours = (:end_time - start_time) / 3600.0,
+        fuel_consumption_liters =
+            (:end_time - start_time) / 3600.0
+            * COALESCE(
+                (SELECT fuel_rate_per_hour FROM fuel_config WHERE id = 1),
+                :default_rate
+            ),
+        end_bright_pixels = :bright_pixels,
+        notes = :notes
+    WHERE id = :session_id
+"""
+
+_SQL_GET_SESSION_TOTALS = (
+    "SELECT duration_hours, fuel_consumption_liters "
+    "FROM generator_sessions WHERE id = ?"
+)
+
+_SQL_GET_ACTIVE = """
+    SELECT id FROM generator_sessions
+    WHERE end_time IS NULL
+    ORDER BY start_time DESC
+    LIMIT 1
+"""
+
+_SQL_GET_SESSION = "SELECT * FROM generator_sessions WHERE id = ?"
+
+_SQL_GET_ALL_SESSIONS = (
+    "SELECT * FROM generator_sessions ORDER BY start_time DESC LIMIT ?"
+)
+
+_SQL_AGGREGATE_RANGE = """
+    SELECT COALESCE(SUM(duration_hours), 0),
+           COALESCE(SUM(fuel_consumption_liters), 0),
+           COUNT(*)
+    FROM generator_sessions
+    WHERE start_time >= ? AND start_time < ?
+"""
+
+# Лише потрібні для підсумків колонки; день за Europe/Kyiv визначає
+# Python (date() у SQLite знає тільки UTC та системний пояс).
+# CAST прибирає оголошений тип, тож конвертер TIMESTAMP не викликається
+_SQL_SESSION_TOTALS_IN_RANGE = """
+    SELECT CAST(start_time AS INTEGER), duration_hours,
+           fuel_consumption_liters
+    FROM generator_sessions
+    WHERE start_time >= ? AND start_time < ?
+"""
+
+_SQL_INSERT_EVENT = """
+    INSERT INTO generator_events (timestamp, event_type, bright_pixels, message)
+    VALUES (?, ?, ?, ?)
+"""
+
+_SQL_GET_EVENTS = (
+    "SELECT * FROM generator_events ORDER BY timestamp DESC LIMIT ?"
+)
+
+_SQL_GET_EVENTS_BY_TYPE = (
+    "SELECT * FROM generator_events WHERE event_type = ? "
+    "ORDER BY timestamp DESC LIMIT ?"
+)
+
+_SQL_GET_FUEL = "SELECT * FROM fuel_config WHERE id = 1"
+
+_SQL_UPDATE_FUEL = """
+    UPDATE fuel_config
+    SET fuel_rate_per_hour = ?,
+        fuel_tank_capacity = ?,
+        fuel_price_per_liter = ?,
+        updated_at = ?
+    WHERE id = 1
+"""
+
 
 class DatabaseRepository:
     """
@@ -21,24 +163,93 @@ class DatabaseRepository:
 
     def __init__(self, db_path: str = "generator_monitor.db"):
         self._db_path = db_path
-        # Ініціалізація часового поясу через pytz
-        self._tz = pytz.timezone("Europe/Kyiv")
+        self._tz = KYIV_TZ
         self._logger = logging.getLogger(self.__class__.__name__)
+        self._last_optimize = time.monotonic()
+
+        # Одне довготривале з'єднання: кеш сторінок SQLite зберігається
+        # між запитами. Транзакціями керуємо явно (isolation_level=None),
+        # доступ з різних потоків серіалізує блокування
+        self._lock = threading.RLock()
+        # Конфігурація палива - один рядок, що змінюється вкрай рідко
+        self._fuel_cache: Optional[FuelConfig] = None
+        self._conn = self._connect()
+        # WAL зберігається у файлі БД, тож достатньо увімкнути один раз
+        self._conn.execute("PRAGMA journal_mode=WAL")
         self._init_database()
 
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self._db_path,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=CACHED_STATEMENTS,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in _CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _maybe_optimize(self, conn: sqlite3.Connection) -> None:
+        """Періодичний PRAGMA optimize (не частіше ніж OPTIMIZE_INTERVAL)"""
+        now = time.monotonic()
+        if now - self._last_optimize < OPTIMIZE_INTERVAL:
+            return
+        self._last_optimize = now
+        conn.execute("PRAGMA optimize")
+
     @contextmanager
     def _get_connection(self) -> Generator[sqlite3.Connection, None, None]:
-        conn = sqlite3.connect(self._db_path)
-        conn.row_factory = sqlite3.Row
+        with self._lock:
+            if self._conn.in_transaction:
+                # Всередині transaction() - фіксацію виконає вона
+                yield self._conn
+                return
+
+            with self._begin("BEGIN"):
+                yield self._conn
+
+    @contextmanager
+    def _begin(self, statement: str) -> Generator[None, None, None]:
+        """Явна транзакція на спільному з'єднанні (під блокуванням)"""
+        self._conn.execute(statement)
         try:
-            yield conn
-            conn.commit()
-        except sqlite3.Error as e:
-            conn.rollback()
-            self._logger.error(f"Помилка БД: {e}")
+            yield
+            self._conn.execute("COMMIT")
+        except BaseException as e:
+            # SQLite може вже скасувати транзакцію сам (напр. диск повний)
+            if self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+            if isinstance(e, sqlite3.Error):
+                self._logger.error(f"Помилка БД: {e}")
             raise
-        finally:
-            conn.close()
+
+    @contextmanager
+    def transaction(self) -> Generator[None, None, None]:
+        """
+        Об'єднання кількох операцій репозиторію в одну транзакцію.
+
+        Усі виклики методів репозиторію всередині блоку фіксуються одним
+        COMMIT; інші потоки чекають на завершення блоку.
+        Вкладені блоки стають частиною зовнішньої транзакції.
+        """
+        with self._lock:
+            if self._conn.in_transaction:
+                yield
+                return
+
+            with self._begin("BEGIN IMMEDIATE"):
+                yield
+
+    def close(self) -> None:
+        """Закриття з'єднання з БД"""
+        with self._lock:
+            try:
+                self._conn.execute("PRAGMA optimize")
+            except sqlite3.Error as e:
+                self._logger.error(f"Помилка БД: {e}")
+            self._conn.close()
 
     def _init_database(self) -> None:
         """Ініціалізація структури БД."""
@@ -88,6 +299,27 @@ class DatabaseRepository:
             """
             )
 
+            cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_sessions_start
+                ON generator_sessions(start_time)
+            """
+            )
+
+            cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_events_ts
+                ON generator_events(timestamp)
+            """
+            )
+
+            cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_events_type_ts
+                ON generator_events(event_type, timestamp DESC)
+            """
+            )
+
             cursor.execute("SELECT COUNT(*) FROM fuel_config WHERE id = 1")
             if cursor.fetchone()[0] == 0:
                 cursor.execute(
@@ -97,36 +329,41 @@ class DatabaseRepository:
                 """
                 )
 
-    # ========== HELPER METHODS ==========
-
-    def _get_current_time(self) -> datetime:
-        """Повертає поточний час у зоні Europe/Kyiv."""
-        # У pytz метод now(tz) працює коректно
-        return datetime.now(self._tz)
+            cursor.execute("PRAGMA user_version")
+            if cursor.fetchone()[0] < SCHEMA_VERSION:
+                self._migrate_to_epoch(cursor)
+                cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
 
-    def _parse_db_datetime(self, db_val: str) -> Optional[datetime]:
+    def _migrate_to_epoch(self, cursor: sqlite3.Cursor) -> None:
         """
-        Безпечно парсить час з БД.
-        Адаптовано для pytz (використовує localize замість replace).
-        """
-        if not db_val:
-            return None
+        Переведення часу, збереженого ISO-рядками, в unix epoch.
 
-        # fromisoformat доступний у Python 3.7+
-        dt = datetime.fromisoformat(db_val)
+        strftime('%s') враховує зсув у рядку (+02:00/+03:00), а рядки
+        без зсуву (CURRENT_TIMESTAMP) і так записані в UTC.
+        """
+        for table, column in _EPOCH_COLUMNS:
+            cursor.execute(
+                f"UPDATE {table} "
+                f"SET {column} = CAST(strftime('%s', {column}) AS INTEGER) "
+                f"WHERE typeof({column}) = 'text'"
+            )
+            if cursor.rowcount:
+                self._logger.info(
+                    f"🔄 {table}.{column}: {cursor.rowcount} записів "
+                    f"переведено в unix epoch"
+                )
 
-        # Якщо дата "нативна" (без часового поясу), додаємо його
-        if dt.tzinfo is None:
-            # Треба використовувати .localize()
-            dt = self._tz.localize(dt)
+    # ========== HELPER METHODS ==========
 
-        return dt
+    def _get_current_time(self) -> datetime:
+        """Повертає поточний час у зоні Europe/Kyiv."""
+        return datetime.now(self._tz)
 
     def _map_row_to_session(self, row: sqlite3.Row) -> GeneratorSession:
         return GeneratorSession(
             id=row["id"],
-            start_time=self._parse_db_datetime(row["start_time"]),
-            end_time=self._parse_db_datetime(row["end_time"]),
+            start_time=row["start_time"],
+            end_time=row["end_time"],
             duration_seconds=row["duration_seconds"],
             duration_hours=row["duration_hours"],
             fuel_consumption_liters=row["fuel_consumption_liters"],
@@ -138,7 +375,7 @@ class DatabaseRepository:
     def _map_row_to_event(self, row: sqlite3.Row) -> GeneratorEvent:
         return GeneratorEvent(
             id=row["id"],
-            timestamp=self._parse_db_datetime(row["timestamp"]),
+            timestamp=row["timestamp"],
             event_type=row["event_type"],
             bright_pixels=row["bright_pixels"],
             message=row["message"],
@@ -160,10 +397,7 @@ class DatabaseRepository:
 
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO generator_sessions (start_time, start_bright_pixels) VALUES (?, ?)",
-                (start_time, bright_pixels),
-            )
+            cursor.execute(_SQL_INSERT_SESSION, (start_time, bright_pixels))
             session_id = cursor.lastrowid
 
             time_str = start_time.strftime("%Y-%m-%d %H:%M:%S")
@@ -186,50 +420,29 @@ class DatabaseRepository:
         Returns:
             None
         """
+        end_time = self._get_current_time()
+
         with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
-                "SELECT start_time FROM generator_sessions WHERE id = ?",
-                (session_id,),
+                _SQL_END_SESSION,
+                {
+                    "end_time": end_time,
+                    "default_rate": FuelConfig().fuel_rate_per_hour,
+                    "bright_pixels": bright_pixels,
+                    "notes": notes,
+                    "session_id": session_id,
+                },
             )
-            row = cursor.fetchone()
 
-            if not row:
+            if cursor.rowcount == 0:
                 self._logger.error(f"❌ Сесія #{session_id} не знайдена.")
                 return
 
-            start_time = self._parse_db_datetime(row["start_time"])
-            end_time = self._get_current_time()
-
-            # Розрахунок різниці
-            duration = end_time - start_time
-            duration_seconds = int(duration.total_seconds())
-            duration_hours = duration.total_seconds() / 3600.0
-
-            fuel_config = self.get_fuel_config()
-            fuel_consumption = duration_hours * fuel_config.fuel_rate_per_hour
-
-            cursor.execute(
-                """
-                UPDATE generator_sessions
-                SET end_time = ?,
-                    duration_seconds = ?,
-                    duration_hours = ?,
-                    fuel_consumption_liters = ?,
-                    end_bright_pixels = ?,
-                    notes = ?
-                WHERE id = ?
-            """,
-                (
-                    end_time,
-                    duration_seconds,
-                    duration_hours,
-                    fuel_consumption,
-                    bright_pixels,
-                    notes,
-                    session_id,
-                ),
-            )
+            cursor.execute(_SQL_GET_SESSION_TOTALS, (session_id,))
+            row = cursor.fetchone()
+            duration_hours = row["duration_hours"]
+            fuel_consumption = row["fuel_consumption_liters"]
 
             self._logger.info(
                 f"🔴 Завершено сесію #{session_id}. "
@@ -245,36 +458,107 @@ class DatabaseRepository:
         """
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(
-                """
-                SELECT id FROM generator_sessions
-                WHERE end_time IS NULL
-                ORDER BY start_time DESC
-                LIMIT 1
-            """
-            )
+            cursor.execute(_SQL_GET_ACTIVE)
             row = cursor.fetchone()
             return row["id"] if row else None
 
     def get_session(self, session_id: int) -> Optional[GeneratorSession]:
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(
-                "SELECT * FROM generator_sessions WHERE id = ?", (session_id,)
-            )
+            cursor.execute(_SQL_GET_SESSION, (session_id,))
             row = cursor.fetchone()
             return self._map_row_to_session(row) if row else None
 
     def get_all_sessions(self, limit: int = 100) -> List[GeneratorSession]:
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(
-                "SELECT * FROM generator_sessions ORDER BY start_time DESC LIMIT ?",
-                (limit,),
-            )
+            cursor.execute(_SQL_GET_ALL_SESSIONS, (limit,))
             rows = cursor.fetchall()
             return [self._map_row_to_session(row) for row in rows]
 
+    def aggregate_range(
+        self, start_dt: datetime, end_dt: datetime
+    ) -> Tuple[float, float, int]:
+        """
+        Сумарна статистика сесій, що почались у діапазоні [start_dt, end_dt).
+
+        Returns:
+            (години роботи, літри палива, кількість сесій)
+        """
+        with self._get_connection() as conn:
+            self._maybe_optimize(conn)
+            cursor = conn.cursor()
+            cursor.execute(_SQL_AGGREGATE_RANGE, (start_dt, end_dt))
+            runtime_hours, fuel_liters, count = cursor.fetchone()
+            return runtime_hours, fuel_liters, count
+
+    def aggregate_by_day(
+        self, start_dt: datetime, end_dt: datetime
+    ) -> List[Tuple[str, float, float, int]]:
+        """
+        Статистика сесій у діапазоні [start_dt, end_dt) по днях.
+
+        Returns:
+            Список (дата "YYYY-MM-DD", години, літри, кількість сесій),
+            лише дні, у які були сесії
+        """
+        days = {}
+        for day, hours, liters in self.iter_session_aggregates(
+            start_dt, end_dt
+        ):
+            totals = days.setdefault(day, [0.0, 0.0, 0])
+            totals[0] += hours or 0.0
+            totals[1] += liters or 0.0
+            totals[2] += 1
+
+        return [(day.isoformat(), *days[day]) for day in sorted(days)]
+
+    def iter_session_aggregates(
+        self, start_dt: datetime, end_dt: datetime
+    ) -> Iterator[Tuple[date, Optional[float], Optional[float]]]:
+        """
+        Дата початку, години та літри кожної сесії з [start_dt, end_dt).
+
+        Без побудови GeneratorSession та datetime на кожен рядок: день
+        визначається пошуком epoch серед меж діб Europe/Kyiv.
+
+        Returns:
+            Ітератор (дата, години, літри); для активної сесії години
+            та літри - None
+        """
+        start_dt = self._as_local(start_dt)
+        end_dt = self._as_local(end_dt)
+        with self._get_connection() as conn:
+            # Звіти - єдині регулярні запити на читання, тож статистика
+            # планувальника оновлюється тут
+            self._maybe_optimize(conn)
+            rows = conn.execute(
+                _SQL_SESSION_TOTALS_IN_RANGE, (start_dt, end_dt)
+            ).fetchall()
+        if not rows:
+            return
+
+        day = start_dt.date()
+        days, bounds = [], []
+        while True:
+            midnight = datetime(day.year, day.month, day.day, tzinfo=self._tz)
+            if midnight >= end_dt:
+                break
+            days.append(day)
+            bounds.append(midnight.timestamp())
+            day += timedelta(days=1)
+
+        for start_time, hours, liters in rows:
+            # Перша доба може починатися раніше за start_dt
+            index = max(bisect_right(bounds, start_time) - 1, 0)
+            yield days[index], hours, liters
+
+    def _as_local(self, dt: datetime) -> datetime:
+        """Час у зоні Europe/Kyiv (нативний вважається київським)"""
+        if dt.tzinfo is None:
+            return dt.replace(tzinfo=self._tz)
+        return dt.astimezone(self._tz)
+
     # ========== РОБОТА З ПОДІЯМИ ==========
 
     def add_event(
@@ -299,10 +583,7 @@ class DatabaseRepository:
         with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
-                """
-                INSERT INTO generator_events (timestamp, event_type, bright_pixels, message)
-                VALUES (?, ?, ?, ?)
-            """,
+                _SQL_INSERT_EVENT,
                 (timestamp, event_type, bright_pixels, message),
             )
             return cursor.lastrowid
@@ -312,53 +593,47 @@ class DatabaseRepository:
     ) -> List[GeneratorEvent]:
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            query = "SELECT * FROM generator_events"
-            params = []
-
+            # Два фіксовані запити замість складання рядка
             if event_type:
-                query += " WHERE event_type = ?"
-                params.append(event_type)
-
-            query += " ORDER BY timestamp DESC LIMIT ?"
-            params.append(limit)
-
-            cursor.execute(query, tuple(params))
+                cursor.execute(_SQL_GET_EVENTS_BY_TYPE, (event_type, limit))
+            else:
+                cursor.execute(_SQL_GET_EVENTS, (limit,))
             return [self._map_row_to_event(row) for row in cursor.fetchall()]
 
     # ========== КОНФІГУРАЦІЯ ==========
 
     def get_fuel_config(self) -> FuelConfig:
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM fuel_config WHERE id = 1")
-            row = cursor.fetchone()
+        with self._lock:
+            if self._fuel_cache is not None:
+                return self._fuel_cache
+
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(_SQL_GET_FUEL)
+                row = cursor.fetchone()
 
             if not row:
                 return FuelConfig(1.4, 6.0, 60.0)
 
-            return FuelConfig(
+            self._fuel_cache = FuelConfig(
                 fuel_rate_per_hour=row["fuel_rate_per_hour"],
                 fuel_tank_capacity=row["fuel_tank_capacity"],
                 fuel_price_per_liter=row["fuel_price_per_liter"],
             )
+            return self._fuel_cache
 
     def update_fuel_config(self, config: FuelConfig) -> None:
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                UPDATE fuel_config
-                SET fuel_rate_per_hour = ?,
-                    fuel_tank_capacity = ?,
-                    fuel_price_per_liter = ?,
-                    updated_at = ?
-                WHERE id = 1
-            """,
-                (
-                    config.fuel_rate_per_hour,
-                    config.fuel_tank_capacity,
-                    config.fuel_price_per_liter,
-                    self._get_current_time(),
-                ),
-            )
+        with self._lock:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    _SQL_UPDATE_FUEL,
+                    (
+                        config.fuel_rate_per_hour,
+                        config.fuel_tank_capacity,
+                        config.fuel_price_per_liter,
+                        self._get_current_time(),
+                    ),
+                )
+            self._fuel_cache = config
             self._logger.info("⚙️ Конфігурацію палива оновлено")
@@ -3,10 +3,11 @@
 """
 
 import logging
-from datetime import datetime, timedelta
-from typing import List
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Tuple
 from dataclasses import dataclass
 
+from database.models import FuelConfig
 from database.repository import DatabaseRepository
 
 
@@ -46,11 +47,29 @@ class StatisticsService:
         """
         self._repo = repository
         self._logger = logging.getLogger(self.__class__.__name__)
+        # Кеш статистики за сьогодні. Ключ - дата та конфігурація палива,
+        # тож зміна доби чи update_fuel_config() (вартість рахується за
+        # ціною палива) автоматично робить його неактуальним
+        self._today_cache: Dict[Tuple[date, FuelConfig], DailyStats] = {}
 
     def get_today_stats(self) -> DailyStats:
-        """Статистика за сьогодні"""
-        today = datetime.now().date()
-        return self._get_stats_for_date(today)
+        """
+        Статистика за сьогодні
+
+        Кеш допомагає повторним запитам звіту "today". Монітор при зміні
+        стану спершу скидає кеш, тож там запит до БД виконується завжди.
+        """
+        # Конфігурація палива береться з кешу репозиторію, без запиту
+        key = (datetime.now().date(), self._repo.get_fuel_config())
+        stats = self._today_cache.get(key)
+        if stats is None:
+            stats = self._get_stats_for_date(key[0])
+            self._today_cache = {key: stats}
+        return stats
+
+    def invalidate_stats_cache(self):
+        """Скидання кешу (викликати після зміни сесій)"""
+        self._today_cache.clear()
 
     def get_yesterday_stats(self) -> DailyStats:
         """Статистика за вчора"""
@@ -58,11 +77,35 @@ class StatisticsService:
         return self._get_stats_for_date(yesterday)
 
     def get_week_stats(self) -> List[DailyStats]:
-        """Статистика за тиждень"""
+        """Статистика за тиждень (від сьогодні до 6 днів тому)"""
+        today = datetime.now().date()
+        start = datetime(today.year, today.month, today.day) - timedelta(
+            days=6
+        )
+
+        # Один запит по днях замість окремого на кожен день
+        day_rows = {
+            day: (runtime, fuel, count)
+            for day, runtime, fuel, count in self._repo.aggregate_by_day(
+                start, start + timedelta(days=7)
+            )
+        }
+        fuel_config = self._repo.get_fuel_config()
+
         stats = []
         for i in range(7):
-            date = datetime.now().date() - timedelta(days=i)
-            stats.append(self._get_stats_for_date(date))
+            date_str = (today - timedelta(days=i)).strftime("%Y-%m-%d")
+            runtime, fuel, count = day_rows.get(date_str, (0, 0, 0))
+            stats.append(
+                DailyStats(
+                    date=date_str,
+                    total_runtime_hours=runtime,
+                    total_fuel_liters=fuel,
+                    total_cost=fuel * fuel_config.fuel_price_per_liter,
+                    sessions_count=count,
+                    avg_session_duration=runtime / count if count else 0,
+                )
+            )
         return stats
 
     def get_month_stats(
@@ -82,87 +125,59 @@ class StatisticsService:
         year = year or now.year
         month = month or now.month
 
-        # Отримуємо всі сесії за місяць
-        sessions = self._repo.get_all_sessions(limit=1000)
-
-        month_sessions = [
-            s
-            for s in sessions
-            if s.start_time
-            and s.start_time.year == year
-            and s.start_time.month == month
-        ]
-
-        # Розраховуємо загальну статистику
-        total_runtime = sum(s.duration_hours or 0 for s in month_sessions)
-        total_fuel = sum(
-            s.fuel_consumption_liters or 0 for s in month_sessions
-        )
+        start = datetime(year, month, 1)
+        if month == 12:
+            end = datetime(year + 1, 1, 1)
+        else:
+            end = datetime(year, month + 1, 1)
 
+        # SQL віддає лише рядки сесій місяця, по днях їх групує репозиторій
+        day_rows = self._repo.aggregate_by_day(start, end)
         fuel_config = self._repo.get_fuel_config()
-        total_cost = total_fuel * fuel_config.fuel_price_per_liter
 
-        # Статистика по днях
-        daily_stats = {}
-        for session in month_sessions:
-            date_str = session.start_time.strftime("%Y-%m-%d")
-            if date_str not in daily_stats:
-                daily_stats[date_str] = {"runtime": 0, "fuel": 0, "count": 0}
-            daily_stats[date_str]["runtime"] += session.duration_hours or 0
-            daily_stats[date_str]["fuel"] += (
-                session.fuel_consumption_liters or 0
+        daily_stats_list = [
+            DailyStats(
+                date=day,
+                total_runtime_hours=runtime,
+                total_fuel_liters=fuel,
+                total_cost=fuel * fuel_config.fuel_price_per_liter,
+                sessions_count=count,
+                avg_session_duration=runtime / count if count > 0 else 0,
             )
-            daily_stats[date_str]["count"] += 1
+            for day, runtime, fuel, count in day_rows
+        ]
 
-        daily_stats_list = []
-        for date_str, stats in daily_stats.items():
-            daily_stats_list.append(
-                DailyStats(
-                    date=date_str,
-                    total_runtime_hours=stats["runtime"],
-                    total_fuel_liters=stats["fuel"],
-                    total_cost=stats["fuel"]
-                    * fuel_config.fuel_price_per_liter,
-                    sessions_count=stats["count"],
-                    avg_session_duration=(
-                        stats["runtime"] / stats["count"]
-                        if stats["count"] > 0
-                        else 0
-                    ),
-                )
-            )
+        total_runtime = sum(d.total_runtime_hours for d in daily_stats_list)
+        total_fuel = sum(d.total_fuel_liters for d in daily_stats_list)
+        total_cost = total_fuel * fuel_config.fuel_price_per_liter
 
         return MonthlyStats(
             month=f"{year}-{month:02d}",
             total_runtime_hours=total_runtime,
             total_fuel_liters=total_fuel,
             total_cost=total_cost,
-            sessions_count=len(month_sessions),
-            daily_stats=sorted(daily_stats_list, key=lambda x: x.date),
+            sessions_count=sum(d.sessions_count for d in daily_stats_list),
+            daily_stats=daily_stats_list,
         )
 
     def _get_stats_for_date(self, date) -> DailyStats:
         """Статистика за конкретну дату"""
-        sessions = self._repo.get_all_sessions(limit=1000)
-
-        day_sessions = [
-            s for s in sessions if s.start_time and s.start_time.date() == date
-        ]
-
-        total_runtime = sum(s.duration_hours or 0 for s in day_sessions)
-        total_fuel = sum(s.fuel_consumption_liters or 0 for s in day_sessions)
+        start = datetime(date.year, date.month, date.day)
+        total_runtime, total_fuel, sessions_count = self._repo.aggregate_range(
+            start, start + timedelta(days=1)
+        )
 
         fuel_config = self._repo.get_fuel_config()
         total_cost = total_fuel * fuel_config.fuel_price_per_liter
 
-        avg_duration = total_runtime / len(day_sessions) if day_sessions else 0
+        avg_duration = total_runtime / sessions_count if sessions_count else 0
 
         return DailyStats(
             date=date.strftime("%Y-%m-%d"),
             total_runtime_hours=total_runtime,
             total_fuel_liters=total_fuel,
             total_cost=total_cost,
-            sessions_count=len(day_sessions),
+            sessions_count=sessions_count,
             avg_session_duration=avg_duration,
         )
 
@@ -1,10 +1,11 @@
 import cv2
 import logging
-from typing import Tuple
+from typing import Optional, Tuple
 import numpy as np
 
 from interfaces.base import IDetector
 from config.settings import DetectionConfig
+from detection.kernel import count_bright, count_bright_pair
 
 
 class BrightSpotDetector(IDetector):
@@ -15,63 +16,82 @@ class BrightSpotDetector(IDetector):
         self._logger = logging.getLogger(self.__class__.__name__)
         config.validate()
 
-    def detect(self, frame: np.ndarray) -> Tuple[bool, int]:
+        # Пороги не змінюються, тож читаються з конфігурації один раз.
+        # Поріг червоного може бути від'ємним (тоді рахуються всі пікселі)
+        self._thr_gray = config.bright_threshold
+        self._thr_red = config.bright_threshold - 50
+        self._min_pixels = config.min_bright_pixels
+
+        # Зріз ROI обчислюється один раз
+        x, y, w, h = config.roi
+        self._roi_slice = np.s_[y : y + h, x : x + w]
+        # Буфер маски, що перевикористовується між кадрами
+        self._mask = np.empty((h, w), dtype=bool)
+
+        # Результат для останнього ROI: незмінні байти - той самий результат
+        self._last_roi_hash: Optional[int] = None
+        self._last_result: Tuple[bool, int] = (False, 0)
+
+    def detect(
+        self, frame: np.ndarray, gray_roi: Optional[np.ndarray] = None
+    ) -> Tuple[bool, int]:
         """
         Визначення яскравої точки (лампочки)
 
+        Args:
+            frame: Кадр
+            gray_roi: Grayscale ROI, якщо вже обчислений викликачем
+
         Returns:
             (is_detected, bright_pixels)
         """
-        try:
-            # Вирізаємо ROI
-            roi_frame = self._extract_roi(frame)
-
-            # Подвійна перевірка: grayscale + червоний канал
-            gray_pixels = self._detect_in_grayscale(roi_frame)
-            red_pixels = self._detect_in_red_channel(roi_frame)
+        # Вирізаємо ROI
+        roi_frame = self._extract_roi(frame)
 
-            # Використовуємо максимум
-            bright_pixels = max(gray_pixels, red_pixels)
-            is_detected = bright_pixels >= self._config.min_bright_pixels
+        roi_hash = hash(roi_frame.tobytes())
+        if roi_hash == self._last_roi_hash:
+            return self._last_result
 
-            self._logger.debug(
-                f"Gray: {gray_pixels}, Red: {red_pixels}, "
-                f"Total: {bright_pixels}, Detected: {is_detected}"
-            )
+        # Подвійна перевірка: grayscale + червоний канал
+        gray_pixels, red_pixels = self._count_bright_pixels(
+            roi_frame, gray_roi
+        )
 
-            return is_detected, bright_pixels
+        # Використовуємо максимум
+        bright_pixels = max(gray_pixels, red_pixels)
+        is_detected = bright_pixels >= self._min_pixels
+
+        # Ледаче форматування: рядок будується, лише якщо DEBUG увімкнено
+        self._logger.debug(
+            "Gray: %d, Red: %d, Total: %d, Detected: %s",
+            gray_pixels,
+            red_pixels,
+            bright_pixels,
+            is_detected,
+        )
 
-        except Exception as e:
-            self._logger.error(f"Помилка детекції: {e}")
-            return False, 0
+        self._last_roi_hash = roi_hash
+        self._last_result = (is_detected, bright_pixels)
+        return self._last_result
 
     def _extract_roi(self, frame: np.ndarray) -> np.ndarray:
         """Вирізання ROI з кадру"""
-        x, y, w, h = self._config.roi
-        return frame[y : y + h, x : x + w]
-
-    def _detect_in_grayscale(self, roi: np.ndarray) -> int:
-        """Визначення в grayscale"""
-        if len(roi.shape) == 3:
-            gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = roi
-
-        _, mask = cv2.threshold(
-            gray, self._config.bright_threshold, 255, cv2.THRESH_BINARY
-        )
-        return cv2.countNonZero(mask)
+        return frame[self._roi_slice]
 
-    def _detect_in_red_channel(self, roi: np.ndarray) -> int:
-        """Визначення в червоному каналі"""
+    def _count_bright_pixels(
+        self, roi: np.ndarray, gray: Optional[np.ndarray] = None
+    ) -> Tuple[int, int]:
+        """Підрахунок яскравих пікселів у grayscale і червоному каналі"""
         if len(roi.shape) != 3:
-            return 0
+            return count_bright(roi, self._thr_gray, self._mask), 0
+
+        if gray is None:
+            gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
 
-        b, g, r = cv2.split(roi)
-        _, mask = cv2.threshold(
-            r, self._config.bright_threshold - 50, 255, cv2.THRESH_BINARY
+        # Червоний канал як view, без копіювання через cv2.split
+        return count_bright_pair(
+            gray, roi[..., 2], self._thr_gray, self._thr_red, self._mask
         )
-        return cv2.countNonZero(mask)
 
     @property
     def roi(self) -> Tuple[int, int, int, int]:
@@ -0,0 +1,109 @@
+"""
+Обчислювальні ядра детекції.
+
+Якщо встановлено numba, підрахунок компілюється в машинний код
+і розпаралелюється по рядках ROI; інакше використовується NumPy.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+
+if njit is not None:
+
+    @njit(parallel=True, cache=True, fastmath=True, boundscheck=False)
+    def _count_bright_jit(buf, thr):
+        total = 0
+        for i in prange(buf.shape[0]):
+            row_count = 0
+            for j in range(buf.shape[1]):
+                if buf[i, j] > thr:
+                    row_count += 1
+            total += row_count
+        return total
+
+    @njit(parallel=True, cache=True, fastmath=True, boundscheck=False)
+    def _count_bright_pair_jit(gray, red, thr_gray, thr_red):
+        gray_total = 0
+        red_total = 0
+        for i in prange(gray.shape[0]):
+            gray_row = 0
+            red_row = 0
+            for j in range(gray.shape[1]):
+                if gray[i, j] > thr_gray:
+                    gray_row += 1
+                if red[i, j] > thr_red:
+                    red_row += 1
+            gray_total += gray_row
+            red_total += red_row
+        return gray_total, red_total
+
+
+def count_bright(
+    buf: np.ndarray, thr: int, out: Optional[np.ndarray] = None
+) -> int:
+    """
+    Кількість пікселів, яскравіших за поріг
+
+    Args:
+        buf: Двовимірний uint8 масив (grayscale або один канал)
+        thr: Поріг яскравості (строго більше)
+        out: Bool буфер форми buf для маски, щоб не виділяти
+            пам'ять на кожен кадр (лише для NumPy-варіанту)
+
+    Returns:
+        Кількість яскравих пікселів
+    """
+    if njit is not None:
+        return int(_count_bright_jit(buf, thr))
+    if out is None or out.shape != buf.shape:
+        out = None
+    return int(np.count_nonzero(np.greater(buf, thr, out=out)))
+
+
+def count_bright_pair(
+    gray: np.ndarray,
+    red: np.ndarray,
+    thr_gray: int,
+    thr_red: int,
+    out: Optional[np.ndarray] = None,
+) -> Tuple[int, int]:
+    """
+    Підрахунок яскравих пікселів у grayscale і червоному каналі
+
+    З numba обидва лічильники рахуються за один прохід по ROI.
+
+    Args:
+        gray: Grayscale ROI
+        red: Червоний канал ROI тієї ж форми (може бути strided view)
+        thr_gray: Поріг для grayscale (строго більше)
+        thr_red: Поріг для червоного каналу (строго більше)
+        out: Bool буфер для маски (лише для NumPy-варіанту)
+
+    Returns:
+        (gray_pixels, red_pixels)
+    """
+    if njit is not None:
+        gray_pixels, red_pixels = _count_bright_pair_jit(
+            gray, red, thr_gray, thr_red
+        )
+        return int(gray_pixels), int(red_pixels)
+    return (
+        count_bright(gray, thr_gray, out),
+        count_bright(red, thr_red, out),
+    )
+
+
+def warmup() -> None:
+    """Компіляція ядра заздалегідь, поза основним циклом"""
+    dummy = np.zeros((8, 8, 3), dtype=np.uint8)
+    # Окремо для суцільного масиву та strided view каналу
+    count_bright(np.ascontiguousarray(dummy[..., 0]), 0)
+    count_bright(dummy[..., 2], 0)
+    count_bright_pair(np.ascontiguousarray(dummy[..., 0]), dummy[..., 2], 0, 0)
@@ -1,11 +1,25 @@
 import cv2
 import logging
+import threading
+import time
 from typing import Tuple, Optional
 import numpy as np
 
 from interfaces.base import ICamera
 from config.settings import CameraConfig
 
+# Пауза перед повторною спробою grab() після невдачі
+GRAB_RETRY_DELAY = 0.5
+
+# Якщо grab() не вдається довше, ніж стільки секунд, кадр застарілий
+STALE_FRAME_TIMEOUT = 10.0
+
+# Апаратне декодування H.264, якщо доступне (інакше FFmpeg бере програмне)
+CAPTURE_PARAMS = (
+    cv2.CAP_PROP_HW_ACCELERATION,
+    cv2.VIDEO_ACCELERATION_ANY,
+)
+
 
 class IPCamera(ICamera):
     """Реалізація IP-камери через RTSP"""
@@ -15,11 +29,21 @@ class IPCamera(ICamera):
         self._capture: Optional[cv2.VideoCapture] = None
         self._logger = logging.getLogger(self.__class__.__name__)
 
+        # Фоновий потік постійно вибирає кадри з потоку (grab). З FFmpeg
+        # grab() декодує кожен кадр, а retrieve() в get_frame лише
+        # перетворює останній у BGR
+        self._lock = threading.Lock()
+        self._stop_grabbing = threading.Event()
+        self._grab_thread: Optional[threading.Thread] = None
+        self._last_grab = 0.0
+
     def connect(self) -> bool:
         """Підключення до камери"""
         try:
             self._logger.info(f"Підключення до камери {self._config.ip}...")
-            self._capture = cv2.VideoCapture(self._config.url)
+            self._capture = cv2.VideoCapture(
+                self._config.url, cv2.CAP_FFMPEG, CAPTURE_PARAMS
+            )
 
             if not self._capture.isOpened():
                 self._logger.error("Не вдалося відкрити камеру")
@@ -32,6 +56,7 @@ class IPCamera(ICamera):
                 self.disconnect()
                 return False
 
+            self._start_grabbing()
             self._logger.info(
                 f"✅ Камера підключена: {frame.shape[1]}x{frame.shape[0]}"
             )
@@ -41,13 +66,53 @@ class IPCamera(ICamera):
             self._logger.error(f"Помилка підключення: {e}")
             return False
 
+    def _start_grabbing(self):
+        """Запуск фонового потоку вибірки кадрів"""
+        self._stop_grabbing.clear()
+        self._last_grab = time.monotonic()
+        self._grab_thread = threading.Thread(
+            target=self._grab_loop, name="camera-grabber", daemon=True
+        )
+        self._grab_thread.start()
+
+    def _grab_loop(self):
+        """
+        Постійна вибірка кадрів, щоб буфер потоку не накопичував
+        застарілі кадри між перевірками
+
+        З бекендом FFmpeg grab() декодує кожен кадр, тож потік
+        постійно навантажує CPU декодуванням усього потоку камери
+        (25-30 кадрів/с), а не одного кадру на перевірку
+        """
+        while not self._stop_grabbing.is_set():
+            with self._lock:
+                if self._capture is None:
+                    break
+                grabbed = self._capture.grab()
+
+            if grabbed:
+                # Без паузи: на живому потоці grab() і так чекає на
+                # наступний кадр, а одразу повертається лише тоді, коли
+                # кадри накопичились - їх треба вибрати якнайшвидше
+                self._last_grab = time.monotonic()
+            else:
+                self._stop_grabbing.wait(GRAB_RETRY_DELAY)
+
     def get_frame(self) -> Tuple[bool, Optional[np.ndarray]]:
         """Отримання кадру"""
         if not self.is_connected():
             return False, None
 
+        # Після збою мережі retrieve() віддавав би старий кадр безкінечно,
+        # тож повертаємо помилку, щоб монітор перепідключився
+        if time.monotonic() - self._last_grab > STALE_FRAME_TIMEOUT:
+            self._logger.warning("Потік камери не оновлюється")
+            return False, None
+
         try:
-            ret, frame = self._capture.read()
+            # Декодування останнього вибраного кадру
+            with self._lock:
+                ret, frame = self._capture.retrieve()
             return ret, frame if ret else None
         except Exception as e:
             self._logger.error(f"Помилка отримання кадру: {e}")
@@ -55,10 +120,16 @@ class IPCamera(ICamera):
 
     def disconnect(self):
         """Відключення від камери"""
-        if self._capture is not None:
-            self._capture.release()
-            self._capture = None
-            self._logger.info("Камера відключена")
+        self._stop_grabbing.set()
+        if self._grab_thread is not None:
+            self._grab_thread.join(timeout=5)
+            self._grab_thread = None
+
+        with self._lock:
+            if self._capture is not None:
+                self._capture.release()
+                self._capture = None
+                self._logger.info("Камера відключена")
 
     def is_connected(self) -> bool:
         """Перевірка з'єднання"""
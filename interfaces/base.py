@@ -31,10 +31,16 @@ class IDetector(ABC):
     """Інтерфейс для детектора"""
 
     @abstractmethod
-    def detect(self, frame: np.ndarray) -> Tuple[bool, int]:
+    def detect(
+        self, frame: np.ndarray, gray_roi: Optional[np.ndarray] = None
+    ) -> Tuple[bool, int]:
         """
         Визначення стану
 
+        Args:
+            frame: Кадр
+            gray_roi: Попередньо обчислений grayscale ROI (необов'язково)
+
         Returns:
             (is_detected, confidence): виявлено та впевненість
         """
@@ -53,3 +59,16 @@ class INotifier(ABC):
     def send_image(self, image: np.ndarray, caption: str) -> bool:
         """Відправка зображення"""
         pass
+
+    def send_image_with_message(
+        self, image: np.ndarray, message: str, caption: str
+    ) -> bool:
+        """
+        Відправка повідомлення разом із зображенням
+
+        За замовчуванням - два окремі запити. Реалізації можуть
+        об'єднати їх в один, якщо це підтримує сервіс.
+        """
+        message_sent = self.send_message(message)
+        image_sent = self.send_image(image, caption)
+        return message_sent and image_sent
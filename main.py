@@ -1,3 +1,5 @@
+import logging
+
 from config.settings import (
     MonitorConfig,
     CameraConfig,
@@ -22,7 +24,7 @@ def main():
     """Головна функція"""
 
     # Налаштування логування
-    setup_logging()
+    log_listener = setup_logging()
 
     # Конфігурація системи
     config = MonitorConfig(
@@ -63,10 +65,12 @@ def main():
         print("⚠️ Зупинка системи...")
         monitor.stop()
     except Exception as e:
-        import logging
-
         logging.error(f"Критична помилка: {e}")
         monitor.stop()
+    finally:
+        db_repository.close()
+        # Дописати записи, що лишились у черзі логування
+        log_listener.stop()
 
 
 if __name__ == "__main__":
@@ -2,6 +2,8 @@ import cv2
 import requests
 import logging
 import numpy as np
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from interfaces.base import INotifier
 from config.settings import TelegramConfig
@@ -10,6 +12,27 @@ from config.settings import TelegramConfig
 class TelegramNotifier(INotifier):
     """Telegram нотифікатор"""
 
+    # Максимальна довжина підпису до фото в Telegram
+    MAX_CAPTION_LENGTH = 1024
+
+    # Якість JPEG для фото: помітно менший розмір без видимих втрат
+    JPEG_PARAMS = (
+        int(cv2.IMWRITE_JPEG_QUALITY),
+        80,
+        int(cv2.IMWRITE_JPEG_OPTIMIZE),
+        1,
+    )
+
+    # Повтори при тимчасових помилках Telegram API та мережі.
+    # POST не ідемпотентний, але дубль сповіщення краще, ніж втрата
+    RETRY = Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"POST"}),
+        raise_on_status=False,
+    )
+
     def __init__(self, config: TelegramConfig):
         self._config = config
         self._logger = logging.getLogger(self.__class__.__name__)
@@ -17,6 +40,15 @@ class TelegramNotifier(INotifier):
 
         self._base_url = f"https://api.telegram.org/bot{config.bot_token}"
 
+        # Одна сесія тримає TLS-з'єднання з api.telegram.org відкритим
+        self._session = requests.Session()
+        self._session.mount(
+            "https://",
+            HTTPAdapter(
+                pool_connections=1, pool_maxsize=4, max_retries=self.RETRY
+            ),
+        )
+
     def send_message(self, message: str) -> bool:
         """Відправка текстового повідомлення"""
         url = f"{self._base_url}/sendMessage"
@@ -27,7 +59,7 @@ class TelegramNotifier(INotifier):
         }
 
         try:
-            response = requests.post(url, data=data, timeout=10)
+            response = self._session.post(url, data=data, timeout=10)
 
             if response.status_code == 200:
                 self._logger.info("✅ Повідомлення надіслано")
@@ -46,10 +78,14 @@ class TelegramNotifier(INotifier):
 
         try:
             # Конвертуємо в JPEG
-            _, img_encoded = cv2.imencode(".jpg", image)
+            ok, img_encoded = cv2.imencode(".jpg", image, self.JPEG_PARAMS)
+            if not ok:
+                self._logger.error("Не вдалося закодувати фото")
+                return False
 
+            # memoryview замість tobytes(): без зайвої копії буфера
             files = {
-                "photo": ("image.jpg", img_encoded.tobytes(), "image/jpeg")
+                "photo": ("image.jpg", memoryview(img_encoded), "image/jpeg")
             }
             data = {
                 "chat_id": self._config.chat_id,
@@ -57,7 +93,9 @@ class TelegramNotifier(INotifier):
                 "parse_mode": "HTML",
             }
 
-            response = requests.post(url, files=files, data=data, timeout=30)
+            response = self._session.post(
+                url, files=files, data=data, timeout=30
+            )
 
             if response.status_code == 200:
                 self._logger.info("✅ Фото надіслано")
@@ -69,3 +107,11 @@ class TelegramNotifier(INotifier):
         except Exception as e:
             self._logger.error(f"Помилка відправки фото: {e}")
             return False
+
+    def send_image_with_message(
+        self, image: np.ndarray, message: str, caption: str
+    ) -> bool:
+        """Відправка фото з повідомленням як підписом (один запит)"""
+        if len(message) <= self.MAX_CAPTION_LENGTH:
+            return self.send_image(image, message)
+        return super().send_image_with_message(image, message, caption)
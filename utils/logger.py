@@ -1,11 +1,117 @@
 import logging
 import os
+import queue
+import time
+from typing import Optional
+from logging.handlers import QueueHandler, QueueListener
+
+# Розмір буфера файлу логів
+LOG_BUFFER_SIZE = 64 * 1024
+
+# Максимальний інтервал між скиданнями буфера, сек
+LOG_FLUSH_INTERVAL = 30.0
+
+
+class BufferedFileHandler(logging.FileHandler):
+    """
+    Файловий обробник з буферизованим записом.
+
+    На відміну від FileHandler не скидає буфер після кожного запису:
+    дані потрапляють у файл блоками по LOG_BUFFER_SIZE або не рідше
+    ніж раз на flush_interval секунд (перевіряється при записі), а
+    записи рівня flush_level і вище скидаються одразу. Залишок буфера
+    записується при закритті (logging.shutdown під час виходу).
+    Файл відкривається лише при першому записі.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        encoding: str = "utf-8",
+        buffer_size: int = LOG_BUFFER_SIZE,
+        flush_level: int = logging.WARNING,
+        flush_interval: float = LOG_FLUSH_INTERVAL,
+    ):
+        self._buffer_size = buffer_size
+        self._flush_level = flush_level
+        self._flush_interval = flush_interval
+        self._last_flush = time.monotonic()
+        super().__init__(filename, encoding=encoding, delay=True)
+
+    def _open(self):
+        return open(
+            self.baseFilename,
+            self.mode,
+            buffering=self._buffer_size,
+            encoding=self.encoding,
+            errors=self.errors,
+        )
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+            now = time.monotonic()
+            if (
+                record.levelno >= self._flush_level
+                or now - self._last_flush >= self._flush_interval
+            ):
+                self.flush()
+                self._last_flush = now
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+class CachedTimeFormatter(logging.Formatter):
+    """
+    Formatter, що форматує час не частіше ніж раз на секунду.
+
+    Обидва обробники використовують один екземпляр, тож для запису,
+    який виводиться і у файл, і в консоль, strftime виконується раз.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # (ціла секунда, datefmt, рядок часу без мілісекунд)
+        self._time_cache = (None, None, "")
+
+    def formatTime(self, record: logging.LogRecord, datefmt=None) -> str:
+        sec = int(record.created)
+        cached_sec, cached_fmt, formatted = self._time_cache
+        if sec != cached_sec or datefmt != cached_fmt:
+            ct = self.converter(record.created)
+            formatted = time.strftime(datefmt or self.default_time_format, ct)
+            self._time_cache = (sec, datefmt, formatted)
+
+        if datefmt or not self.default_msec_format:
+            return formatted
+        return self.default_msec_format % (formatted, record.msecs)
+
+
+# Слухач черги логів, якщо логування вже налаштовано
+_listener: Optional[QueueListener] = None
 
 
 def setup_logging(
     log_folder: str = "logs", log_file: str = "generator_monitor.log"
-):
-    """Налаштування системи логування"""
+) -> QueueListener:
+    """
+    Налаштування системи логування
+
+    Записи з усіх потоків лише кладуться в чергу, а форматування та
+    запис у файл і консоль виконує фоновий потік QueueListener.
+    Повторний виклик не додає обробники вдруге.
+
+    Returns:
+        Запущений QueueListener - викликати stop() при завершенні,
+        щоб дописати записи, що лишились у черзі
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
 
     # Створюємо папку для логів
     os.makedirs(log_folder, exist_ok=True)
@@ -13,25 +119,33 @@ def setup_logging(
     log_path = os.path.join(log_folder, log_file)
 
     # Налаштування форматування
-    formatter = logging.Formatter(
+    formatter = CachedTimeFormatter(
         "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     )
 
     # File handler
-    file_handler = logging.FileHandler(log_path, encoding="utf-8")
+    file_handler = BufferedFileHandler(log_path, encoding="utf-8")
     file_handler.setFormatter(formatter)
 
     # Console handler
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
 
+    # Обробники працюють у потоці слухача, до root - лише черга
+    log_queue = queue.SimpleQueue()
+    _listener = QueueListener(
+        log_queue, file_handler, console_handler, respect_handler_level=True
+    )
+    _listener.start()
+
     # Root logger
     root_logger = logging.getLogger()
     root_logger.setLevel(logging.INFO)
-    root_logger.addHandler(file_handler)
-    root_logger.addHandler(console_handler)
+    root_logger.addHandler(QueueHandler(log_queue))
 
     logging.info("=" * 40)
     logging.info("Логування налаштовано")
-    logging.info(f"Файл логів: {log_path}")
+    logging.info("Файл логів: %s", log_path)
     logging.info("=" * 40)
+
+    return _listener
@@ -0,0 +1,89 @@
+"""
+Обчислювальні ядра візуалізації.
+
+Якщо встановлено numba, накладання спрайтів написів компілюється
+в машинний код; інакше використовується NumPy.
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+if njit is not None:
+
+    # Без parallel: спрайт - кілька десятків рядків, запуск потоків
+    # коштує більше за саме змішування
+    @njit(cache=True, boundscheck=False)
+    def _blend_sprite_jit(display, alpha, x0, y0, color):
+        y1 = max(y0, 0)
+        x1 = max(x0, 0)
+        y2 = min(y0 + alpha.shape[0], display.shape[0])
+        x2 = min(x0 + alpha.shape[1], display.shape[1])
+        for i in range(y1, y2):
+            for j in range(x1, x2):
+                a = np.uint32(alpha[i - y0, j - x0, 0])
+                if a == 0:
+                    continue
+                inv = np.uint32(255) - a
+                for c in range(3):
+                    blended = (
+                        np.uint32(display[i, j, c]) * inv
+                        + np.uint32(color[c]) * a
+                        + np.uint32(127)
+                    )
+                    display[i, j, c] = blended // np.uint32(255)
+
+
+def blend_sprite(
+    display: np.ndarray,
+    alpha: np.ndarray,
+    x0: int,
+    y0: int,
+    color: Tuple[int, int, int],
+) -> None:
+    """
+    Накладання спрайта кольором color за каналом прозорості
+
+    Змішування в цілих числах: при alpha 0/255 результат збігається
+    з putText без згладжування.
+
+    Args:
+        display: BGR кадр uint8, змінюється на місці
+        alpha: Прозорість uint16 форми (h, w, 1)
+        x0: Лівий край спрайта на кадрі (може виходити за межі)
+        y0: Верхній край спрайта на кадрі (може виходити за межі)
+        color: Колір BGR
+    """
+    if njit is not None:
+        _blend_sprite_jit(display, alpha, x0, y0, color)
+        return
+
+    # Обрізання по межах кадру
+    h, w = alpha.shape[:2]
+    x1, y1 = max(x0, 0), max(y0, 0)
+    x2 = min(x0 + w, display.shape[1])
+    y2 = min(y0 + h, display.shape[0])
+    if x1 >= x2 or y1 >= y2:
+        return
+
+    a = alpha[y1 - y0 : y2 - y0, x1 - x0 : x2 - x0]
+    region = display[y1:y2, x1:x2]
+    blended = region * (255 - a) + np.array(color, np.uint16) * a
+    region[...] = (blended + 127) // 255
+
+
+def warmup() -> None:
+    """Компіляція ядра заздалегідь, поза основним циклом"""
+    blend_sprite(
+        np.zeros((8, 8, 3), dtype=np.uint8),
+        np.zeros((4, 4, 1), dtype=np.uint16),
+        0,
+        0,
+        (0, 0, 0),
+    )
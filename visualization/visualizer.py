@@ -1,68 +1,327 @@
 import cv2
+import time
+from functools import lru_cache
 from datetime import datetime
-from typing import Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 import numpy as np
 
+from visualization import kernel
+
+# Атрибути cv2 та кольори (BGR) - без пошуку й створення щокадру
+_FONT = cv2.FONT_HERSHEY_SIMPLEX
+_GREEN = (0, 255, 0)
+_RED = (0, 0, 255)
+_WHITE = (255, 255, 255)
+
+# Колір і напис статусу за індексом int(is_detected)
+_COLORS = (_RED, _GREEN)
+_STATUS = ("LAMP OFF", "LAMP ON")
+
+# Буферів для visualize_batch: пакет із кількох кадрів від камери
+# плюс результат, який споживач ще може тримати
+DISPLAY_POOL_SIZE = 5
+
 
 class FrameVisualizer:
     """Клас для візуалізації кадрів"""
 
+    # Рядок часу змінюється раз на секунду: (epoch секунди, рядок)
+    _ts_cache: Tuple[int, str] = (0, "")
+
+    # Спрайти незмінних написів:
+    # (текст, масштаб, товщина, тип лінії) -> alpha, зсув
+    _text_sprites: Dict[
+        Tuple[str, float, int, int], Tuple[np.ndarray, int, int]
+    ] = {}
+
+    def __init__(
+        self,
+        shape: Optional[Tuple[int, ...]] = None,
+        dtype=np.uint8,
+        pool_size: int = DISPLAY_POOL_SIZE,
+    ):
+        """
+        Args:
+            shape: Форма кадру для попереднього виділення буфера
+                (інакше буфер виділяється під перший кадр)
+            dtype: Тип пікселів кадру
+            pool_size: Кількість буферів для visualize_batch
+        """
+        self._display: Optional[np.ndarray] = (
+            np.empty(shape, dtype) if shape is not None else None
+        )
+        # Буфери пакетної візуалізації використовуються по колу
+        self._display_pool: List[Optional[np.ndarray]] = [
+            np.empty(shape, dtype) if shape is not None else None
+            for _ in range(pool_size)
+        ]
+        self._pool_index = 0
+        self._roi: Optional[Tuple[int, int, int, int]] = None
+        self._roi_corners: Tuple[Tuple[int, int], Tuple[int, int]] = (
+            (0, 0),
+            (0, 0),
+        )
+
+    def update_roi(self, roi: Tuple[int, int, int, int]) -> None:
+        """Задання ROI - кути прямокутника рахуються один раз"""
+        self._roi = roi
+        self._roi_corners = self._corners(roi)
+
     @staticmethod
     def draw_roi(
-        frame: np.ndarray, roi: Tuple[int, int, int, int], is_detected: bool
+        frame: np.ndarray,
+        roi: Tuple[int, int, int, int],
+        is_detected: bool,
+        inplace: bool = False,
     ) -> np.ndarray:
-        """Малювання ROI на кадрі"""
-        display = frame.copy()
-        x, y, w, h = roi
-        color = (0, 255, 0) if is_detected else (0, 0, 255)
-        cv2.rectangle(display, (x, y), (x + w, y + h), color, 2)
+        """Малювання ROI на кадрі (на самому frame, якщо inplace)"""
+        display = frame if inplace else frame.copy()
+        FrameVisualizer._draw_roi_inplace(
+            display, FrameVisualizer._corners(roi), is_detected
+        )
         return display
 
     @staticmethod
     def add_status_text(
-        frame: np.ndarray, is_detected: bool, bright_pixels: int
+        frame: np.ndarray,
+        is_detected: bool,
+        bright_pixels: int,
+        inplace: bool = False,
     ) -> np.ndarray:
-        """Додавання тексту зі статусом"""
-        display = frame.copy()
+        """Додавання тексту зі статусом (на самому frame, якщо inplace)"""
+        display = frame if inplace else frame.copy()
+        FrameVisualizer._add_status_text_inplace(
+            display, is_detected, bright_pixels
+        )
+        return display
 
-        status = "LAMP ON" if is_detected else "LAMP OFF"
-        color = (0, 255, 0) if is_detected else (0, 0, 255)
+    def visualize(
+        self,
+        frame: np.ndarray,
+        roi: Tuple[int, int, int, int],
+        is_detected: bool,
+        bright_pixels: int,
+        inplace: bool = False,
+    ) -> np.ndarray:
+        """
+        Повна візуалізація
 
-        cv2.putText(
-            display, status, (10, 80), cv2.FONT_HERSHEY_SIMPLEX, 1.2, color, 3
-        )
+        Args:
+            inplace: Малювати прямо на frame без копіювання - лише
+                якщо кадр більше ніде не використовується
+
+        Returns:
+            frame, якщо inplace; інакше внутрішній буфер візуалізатора -
+            наступний виклик його перезапише, тож для збереження
+            результату потрібна копія
+        """
+        if inplace:
+            display = frame
+        else:
+            # Кадр копіюється в постійний буфер, далі малюємо на ньому
+            display = self._get_display(frame)
+            np.copyto(display, frame)
+        self._draw(display, roi, is_detected, bright_pixels)
+        return display
+
+    def visualize_batch(
+        self,
+        frames: Sequence[np.ndarray],
+        rois: Sequence[Tuple[int, int, int, int]],
+        flags: Sequence[bool],
+        bright_counts: Sequence[int],
+    ) -> List[np.ndarray]:
+        """
+        Візуалізація кількох кадрів поспіль
+
+        Кожен кадр малюється у наступний буфер пулу, тож результат
+        лишається чинним ще pool_size - 1 кадрів після свого виклику -
+        споживач може тримати попередній, поки малюється наступний.
+
+        Returns:
+            Буфери пулу з візуалізацією, по одному на кадр
+        """
+        count = len(frames)
+        if not count == len(rois) == len(flags) == len(bright_counts):
+            raise ValueError("Batch sequences must have the same length")
+        if count > len(self._display_pool):
+            raise ValueError("Batch is larger than the display pool")
+
+        displays = []
+        for frame, roi, is_detected, bright_pixels in zip(
+            frames, rois, flags, bright_counts
+        ):
+            display = self._next_pool_display(frame)
+            np.copyto(display, frame)
+            self._draw(display, roi, is_detected, bright_pixels)
+            displays.append(display)
+        return displays
+
+    def _draw(
+        self,
+        display: np.ndarray,
+        roi: Tuple[int, int, int, int],
+        is_detected: bool,
+        bright_pixels: int,
+    ) -> None:
+        """ROI та текст статусу на переданому кадрі"""
+        if roi != self._roi:
+            self.update_roi(roi)
+        self._draw_roi_inplace(display, self._roi_corners, is_detected)
+        self._add_status_text_inplace(display, is_detected, bright_pixels)
+
+    def _get_display(self, frame: np.ndarray) -> np.ndarray:
+        """Буфер під кадр (перевиділяється лише при зміні форми)"""
+        if (
+            self._display is None
+            or self._display.shape != frame.shape
+            or self._display.dtype != frame.dtype
+        ):
+            self._display = np.empty_like(frame)
+        return self._display
+
+    def _next_pool_display(self, frame: np.ndarray) -> np.ndarray:
+        """Наступний буфер пулу під кадр"""
+        index = self._pool_index
+        self._pool_index = (index + 1) % len(self._display_pool)
+        display = self._display_pool[index]
+        if (
+            display is None
+            or display.shape != frame.shape
+            or display.dtype != frame.dtype
+        ):
+            display = self._display_pool[index] = np.empty_like(frame)
+        return display
+
+    @staticmethod
+    def _corners(
+        roi: Tuple[int, int, int, int],
+    ) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        """Верхній лівий і нижній правий кути ROI"""
+        x, y, w, h = roi
+        return (x, y), (x + w, y + h)
+
+    @staticmethod
+    def _draw_roi_inplace(
+        display: np.ndarray,
+        corners: Tuple[Tuple[int, int], Tuple[int, int]],
+        is_detected: bool,
+    ) -> None:
+        """Малювання ROI безпосередньо на переданому кадрі"""
+        color = _COLORS[int(bool(is_detected))]
+        cv2.rectangle(display, corners[0], corners[1], color, 2)
+
+    @classmethod
+    def _add_status_text_inplace(
+        cls, display: np.ndarray, is_detected: bool, bright_pixels: int
+    ) -> None:
+        """Додавання тексту зі статусом безпосередньо на переданий кадр"""
+        idx = int(bool(is_detected))
+        status = _STATUS[idx]
+        color = _COLORS[idx]
+
+        # Незмінні написи - готові спрайти замість растеризації putText.
+        # Спрайти, як і putText нижче, без згладжування (LINE_8)
+        cls._blit_text(display, status, (10, 80), 1.2, color, 3)
+
+        prefix = "Bright pixels: "
+        cls._blit_text(display, prefix, (10, 120), 0.7, _WHITE, 2)
         cv2.putText(
             display,
-            f"Bright pixels: {bright_pixels}",
-            (10, 120),
-            cv2.FONT_HERSHEY_SIMPLEX,
+            str(bright_pixels),
+            (10 + cls._text_advance(prefix, 0.7, 2), 120),
+            _FONT,
             0.7,
-            (255, 255, 255),
+            _WHITE,
             2,
+            cv2.LINE_8,
         )
 
-        timestamp = datetime.now().strftime("%d-%m-%Y %H:%M:%S")
         cv2.putText(
             display,
-            timestamp,
+            cls._timestamp(),
             (10, 150),
-            cv2.FONT_HERSHEY_SIMPLEX,
+            _FONT,
             0.6,
-            (255, 255, 255),
+            _WHITE,
             1,
+            cv2.LINE_8,
         )
 
-        return display
+    @classmethod
+    def _blit_text(
+        cls,
+        display: np.ndarray,
+        text: str,
+        org: Tuple[int, int],
+        scale: float,
+        color: Tuple[int, int, int],
+        thickness: int,
+        line_type: int = cv2.LINE_8,
+    ) -> None:
+        """Аналог cv2.putText через накладання готового спрайта"""
+        alpha, dx, dy = cls._text_sprite(text, scale, thickness, line_type)
+        kernel.blend_sprite(display, alpha, org[0] + dx, org[1] + dy, color)
 
     @classmethod
-    def visualize(
+    def _text_sprite(
         cls,
-        frame: np.ndarray,
-        roi: Tuple[int, int, int, int],
-        is_detected: bool,
-        bright_pixels: int,
-    ) -> np.ndarray:
-        """Повна візуалізація"""
-        display = cls.draw_roi(frame, roi, is_detected)
-        display = cls.add_status_text(display, is_detected, bright_pixels)
-        return display
+        text: str,
+        scale: float,
+        thickness: int,
+        line_type: int = cv2.LINE_8,
+    ) -> Tuple[np.ndarray, int, int]:
+        """
+        Спрайт напису - канал прозорості (рендериться один раз)
+
+        Returns:
+            (alpha uint16 форми (h, w, 1), зсув x, зсув y) лівого
+            верхнього кута відносно точки org у cv2.putText
+        """
+        key = (text, scale, thickness, line_type)
+        cached = cls._text_sprites.get(key)
+        if cached is not None:
+            return cached
+
+        (w, h), baseline = cv2.getTextSize(text, _FONT, scale, thickness)
+        pad = thickness + 1
+        canvas = np.zeros((h + baseline + 2 * pad, w + 2 * pad), np.uint8)
+        cv2.putText(
+            canvas,
+            text,
+            (pad, pad + h),
+            _FONT,
+            scale,
+            255,
+            thickness,
+            line_type,
+        )
+
+        # Обрізаємо до пікселів напису
+        ys, xs = np.nonzero(canvas)
+        top, left = ys.min(), xs.min()
+        alpha = canvas[top : ys.max() + 1, left : xs.max() + 1, None]
+        cached = (alpha.astype(np.uint16), int(left - pad), int(top - pad - h))
+        cls._text_sprites[key] = cached
+        return cached
+
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _text_advance(text: str, scale: float, thickness: int) -> int:
+        """Зсув пера після тексту (з якого putText почав би наступний)"""
+        (with_next, _), _ = cv2.getTextSize(
+            text + "0", _FONT, scale, thickness
+        )
+        (next_only, _), _ = cv2.getTextSize("0", _FONT, scale, thickness)
+        return with_next - next_only
+
+    @classmethod
+    def _timestamp(cls) -> str:
+        """Поточний час для підпису (форматується раз на секунду)"""
+        sec = int(time.time())
+        if sec != cls._ts_cache[0]:
+            cls._ts_cache = (
+                sec,
+                datetime.fromtimestamp(sec).strftime("%d-%m-%Y %H:%M:%S"),
+            )
+        return cls._ts_cache[1]